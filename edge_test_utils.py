@@ -6,13 +6,17 @@ import re
 import json
 import copy
 import difflib
+import dis
 import hashlib
 import importlib
 import inspect
+import pickle
 from pprint import pformat
-#import contextlib
-from functools import wraps
-from typing import Dict, Any, List, Callable, Tuple, Optional
+import contextlib
+import contextvars
+from functools import wraps, lru_cache
+from collections.abc import Iterator
+from typing import Dict, Any, List, Callable, Tuple, Optional, Iterable, Generator
 
 T_dods = Dict[str, Dict[str, str]]
 
@@ -40,10 +44,39 @@ class EdgeTestConfig:
     save_data_func = None                   # set this to data saving function    
     load_data_func = None                   # set this to data restore function
     save_data_subdir = None
-    
+
+    # when a decorated function returns a generator, only the first
+    # iterator_head_limit items are saved in the test case. The remaining items are
+    # counted and folded into a rolling hash so memory stays bounded for long streams.
+    iterator_head_limit = 10
+
+    # dotted paths of I/O callables, like 'utilities.s3utils.read_object' or
+    # 'botocore.client.BaseClient._make_api_call', whose responses are recorded into a
+    # cassette saved with each test case and served from it when the case is replayed.
+    # Use register_io_callable() or the intercept_io() decorator to add them at runtime.
+    io_callables: List[str] = []
+
+    # expand_test_cases() runs at most this many mutants of each seed case per round.
+    mutants_per_case_limit = 100
+
+    # expand_test_cases() discards a mutant that runs longer than this many seconds.
+    mutant_timeout = 10
+
+    # budgets for the test case store, None for no limit. When a saved case puts a function
+    # or the whole store over budget, other cases are evicted per eviction_policy, one of
+    # 'redundant' (cases whose lines other cases also cover), 'largest' or 'oldest'.
+    # func_case_count_budget should not be less than test_count_limit.
+    func_case_count_budget: Optional[int] = None
+    func_bytes_budget: Optional[int] = None
+    total_case_count_budget: Optional[int] = None
+    total_bytes_budget: Optional[int] = None
+    eviction_policy = 'redundant'
+
     @classmethod
     def enable(cls):
         cls.enable_edge_tests = True
+        # installed now, before the captured modules bind them with 'from module import name'.
+        install_io_interceptors()
     
     @classmethod
     def disable(cls):
@@ -197,78 +230,744 @@ def save_edge_tests(state: Optional[Any]=None, save_specs: Optional[T_dods]=None
             # Save global variables
             # global_vars = clean_vars(globals())
            
+            # record responses of registered I/O callables so the case can be replayed offline.
+            late_io_callables = install_io_interceptors()
+            if late_io_callables:
+                warnings.warn(
+                    f"I/O callables {late_io_callables} were installed after EdgeTestConfig.enable(). "
+                    "Modules that already imported them with 'from module import name' bypass the cassette.")
+            cassette = Cassette()
+
             # Initialize coverage
             cov = coverage.Coverage()
             cov.start()
 
-            result = func(*my_args, **kwargs)
+            with cassette.active():
+                result = func(*my_args, **kwargs)
 
-            # Stop and save coverage
+            # Stop coverage. It is saved once the test case is recorded.
             cov.stop()
-            cov.save()
 
-            # now add the results of the call.
-            test_data['post_args']      = list(my_args)           # convert from tuple to list
-            test_data['post_kwargs']    = kwargs
-            test_data['result']         = result
+            if is_capturable_iterator(result):
+                if is_saturated(func, func_dirpath):
+                    # no case would be saved, so the items need not be traced or summarized.
+                    return result
 
-            # jsonable_test_data = pickledjson.convert_to_jsonable(test_data)
-            flattened_data = jsonpickle.encode(test_data, keys=True, use_base85=True, indent=4)
-            
-            # # add printable version of each field that has been pickled.
-            # for field in ('pre_args', 'pre_kwargs', 'post_args', 'post_kwargs', 'result'):
-                # if '__PICKLED__' in jsonable_test_data.get(field, ''):
-                    # jsonable_test_data[f"printable_{field}"] = pprint.pformat(test_data[field]).splitlines()
+                # the body of a generator does not run until it is consumed, so the
+                # test case is recorded only when the caller exhausts the iterator.
+                return capture_iterator(
+                    result, cov, cassette,
+                    on_complete=lambda summary: record_test_case(
+                        func, func_dirpath, testcase_path, test_data, cov,
+                        my_args, kwargs, summary, result_type='iterator', cassette=cassette),
+                    )
 
-            # # Serialize the object to JSON
-            # flattened_data = json.dumps(jsonable_test_data, indent=4)
-            
-            executed_lines_in_function = get_executed_lines(cov, func)
-            
-            # Load existing coverage data
-            coverage_path = os.path.join(func_dirpath, 'coverage.json')
-            if os.path.exists(coverage_path):
-                with open(coverage_path, 'r') as f:
-                    coverage_data = json.load(f)
+            record_test_case(func, func_dirpath, testcase_path, test_data, cov, my_args, kwargs, result, cassette=cassette)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def record_test_case(
+        func: Callable,
+        func_dirpath: str,
+        testcase_path: str,
+        test_data: Dict[str, Any],
+        cov,
+        post_args: tuple,
+        post_kwargs: Dict[str, Any],
+        result: Any,
+        result_type: Optional[str]=None,
+        cassette: Optional['Cassette']=None,
+        ):
+    """ Complete the test case with the results of the call and save it if
+        it is within the test count limit or adds code or output coverage.
+
+        If result_type is 'iterator', result is the summary produced by
+        IteratorSummary rather than the value returned by the function.
+        If cassette recorded any I/O calls, it is saved next to the test case.
+    """
+    import jsonpickle
+
+    cov.save()
+
+    if cassette and cassette.unrecordable:
+        # the case could not be replayed offline.
+        warnings.warn(f"Test case of '{func.__qualname__}' not saved: {cassette.unrecordable}")
+        return
+
+    # now add the results of the call.
+    test_data['post_args']      = list(post_args)         # convert from tuple to list
+    test_data['post_kwargs']    = post_kwargs
+    test_data['result']         = result
+    if result_type:
+        test_data['result_type'] = result_type
+    if cassette and cassette.interactions:
+        cassette_path = cassette_path_for(testcase_path)
+        test_data['cassette'] = os.path.basename(cassette_path)
+
+    # jsonable_test_data = pickledjson.convert_to_jsonable(test_data)
+    flattened_data = jsonpickle.encode(test_data, keys=True, use_base85=True, indent=4)
+
+    # # add printable version of each field that has been pickled.
+    # for field in ('pre_args', 'pre_kwargs', 'post_args', 'post_kwargs', 'result'):
+        # if '__PICKLED__' in jsonable_test_data.get(field, ''):
+            # jsonable_test_data[f"printable_{field}"] = pprint.pformat(test_data[field]).splitlines()
+
+    # # Serialize the object to JSON
+    # flattened_data = json.dumps(jsonable_test_data, indent=4)
+
+    executed_lines_in_function = get_executed_lines(cov, func)
+
+    # Load existing coverage data
+    coverage_path = os.path.join(func_dirpath, 'coverage.json')
+    coverage_data = load_coverage_data(func_dirpath)
+
+    # Analyze output differences
+    diff_report, coverage_data['output_coverage']['tested'] = compare_objects(
+        coverage_data['output_coverage'].get('result', None),
+        result,
+        coverage_data['output_coverage'].get('tested', None)
+    )
+
+    # lines not executed by any earlier case
+    new_lines = set(executed_lines_in_function).difference(set(coverage_data['code_coverage']))
+
+    # Update code coverage
+    coverage_data['code_coverage'] = list(set(coverage_data['code_coverage']).union(set(executed_lines_in_function)))
+
+    # Check if new test case should be saved
+
+    # Count existing cases
+    num_existing_cases = _case_store.num_cases(func_dirpath)
+
+    should_save_test = False
+    if num_existing_cases < EdgeTestConfig.test_count_limit:
+        should_save_test = True
+    elif new_lines:
+        should_save_test = True
+    elif contains_false(coverage_data['output_coverage'].get("tested")):
+        should_save_test = True
+
+    if should_save_test:
+        if 'cassette' in test_data:
+            try:
+                cassette.save(cassette_path)
+            except Exception as exc:
+                # such as responses jsonpickle cannot encode. The call itself is not affected.
+                warnings.warn(f"Test case of '{func.__qualname__}' not saved: cassette cannot be saved: {exc!r}")
+                return
+
+        # Save test data
+        with open(testcase_path, 'w') as f:
+            f.write(flattened_data)
+
+        md5hash = os.path.splitext(os.path.basename(testcase_path))[0]
+        coverage_data.setdefault('case_coverage', {})[md5hash] = executed_lines_in_function
+        _case_store.add(func_dirpath, md5hash, executed_lines_in_function)
+        _case_store.enforce_budgets(func_dirpath, md5hash, coverage_data)
+
+        # Save updated coverage data
+        with open(coverage_path, 'w') as f:
+            json.dump(coverage_data, f, indent=4)
+
+
+class CaseStore:
+    """
+    In-memory index of the sizes, ages and executed lines of the saved test cases, used to
+    count cases and to enforce the budgets in EdgeTestConfig without rescanning the store.
+
+    Each function folder is listed, and its coverage.json read, once, when it is first used
+    in this process. The whole store is scanned only when a total budget is set. After that,
+    the index is updated as cases are saved and evicted. Cases written by other processes
+    are seen only by the next process that scans the folder.
+    """
+
+    def __init__(self):
+        # func_dirpath -> md5hash -> {'bytes': int, 'mtime': float, 'lines': frozenset}
+        self.func_entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.func_bytes: Dict[str, int] = {}
+        # func_dirpath -> line -> number of cases of the function that execute it.
+        self.func_line_counts: Dict[str, Dict[int, int]] = {}
+        self.total_bytes = 0
+        self.total_count = 0
+        self.scanned_all = False
+
+    def entries(self, func_dirpath: str) -> Dict[str, Dict[str, Any]]:
+        if func_dirpath not in self.func_entries:
+            self.func_entries[func_dirpath] = {}
+            self.func_bytes[func_dirpath] = 0
+            self.func_line_counts[func_dirpath] = {}
+            if os.path.isdir(func_dirpath):
+                case_coverage = load_coverage_data(func_dirpath).get('case_coverage', {})
+                for case_file in os.listdir(func_dirpath):
+                    if case_file.endswith('.json') and case_file != 'coverage.json':
+                        md5hash = os.path.splitext(case_file)[0]
+                        self.add(func_dirpath, md5hash, case_coverage.get(md5hash, []))
+        return self.func_entries[func_dirpath]
+
+    def scan_all(self):
+        if self.scanned_all:
+            return
+        test_cases_folder = EdgeTestConfig.test_cases_folder
+        if os.path.isdir(test_cases_folder):
+            for module_dirname in os.listdir(test_cases_folder):
+                module_dirpath = os.path.join(test_cases_folder, module_dirname)
+                if os.path.isdir(module_dirpath):
+                    for function_dirname in os.listdir(module_dirpath):
+                        self.entries(os.path.join(module_dirpath, function_dirname))
+        self.scanned_all = True
+
+    def num_cases(self, func_dirpath: str) -> int:
+        return len(self.entries(func_dirpath))
+
+    def add(self, func_dirpath: str, md5hash: str, executed_lines: Iterable[int]):
+        """ Add or update the entry of the case md5hash just saved in func_dirpath. """
+        entries = self.entries(func_dirpath)
+        if md5hash in entries:
+            self._discard(func_dirpath, md5hash)
+
+        testcase_path = os.path.join(func_dirpath, f"{md5hash}.json")
+        case_stat = os.stat(testcase_path)
+        case_bytes = case_stat.st_size
+        cassette_path = cassette_path_for(testcase_path)
+        if os.path.exists(cassette_path):
+            case_bytes += os.path.getsize(cassette_path)
+
+        entry = {'bytes': case_bytes, 'mtime': case_stat.st_mtime, 'lines': frozenset(executed_lines)}
+        entries[md5hash] = entry
+
+        line_counts = self.func_line_counts[func_dirpath]
+        for line in entry['lines']:
+            line_counts[line] = line_counts.get(line, 0) + 1
+
+        self.func_bytes[func_dirpath] += case_bytes
+        self.total_bytes += case_bytes
+        self.total_count += 1
+
+    def evict(self, func_dirpath: str, md5hash: str):
+        """ Delete the case md5hash and its cassette and remove it from the index. """
+        testcase_path = os.path.join(func_dirpath, f"{md5hash}.json")
+        for path in (testcase_path, cassette_path_for(testcase_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._discard(func_dirpath, md5hash)
+
+    def _discard(self, func_dirpath: str, md5hash: str):
+        entry = self.func_entries[func_dirpath].pop(md5hash)
+
+        line_counts = self.func_line_counts[func_dirpath]
+        for line in entry['lines']:
+            line_counts[line] -= 1
+            if not line_counts[line]:
+                del line_counts[line]
+
+        self.func_bytes[func_dirpath] -= entry['bytes']
+        self.total_bytes -= entry['bytes']
+        self.total_count -= 1
+
+    def is_redundant(self, func_dirpath: str, md5hash: str) -> bool:
+        """ Return True if every line executed by the case is also executed by another case of
+            its function. Cases without recorded lines are redundant.
+        """
+        entry = self.entries(func_dirpath)[md5hash]
+        line_counts = self.func_line_counts[func_dirpath]
+        return all(line_counts[line] > 1 for line in entry['lines'])
+
+    def enforce_budgets(self, func_dirpath: str, keep: Optional[str], coverage_data: Dict[str, Any]) -> List[str]:
+        """
+        Evict cases until the function and global budgets in EdgeTestConfig are met.
+
+        The case keep, if given, is never evicted. coverage_data is that of func_dirpath,
+        and its 'case_coverage' is updated in place for the caller to save. The coverage.json
+        of each other function that had a case evicted is reread and updated here, so that
+        changes made to it by other processes are kept.
+
+        Returns the md5hashes of the cases evicted from func_dirpath.
+        """
+        evicted_by_func: Dict[str, List[str]] = {}
+
+        def evict_next(func_dirpaths: List[str]) -> bool:
+            victim = self.select_victim(func_dirpaths, keep)
+            if victim is None:
+                return False
+            self.evict(*victim)
+            evicted_by_func.setdefault(victim[0], []).append(victim[1])
+            return True
+
+        while exceeds(self.num_cases(func_dirpath), EdgeTestConfig.func_case_count_budget) \
+                or exceeds(self.func_bytes[func_dirpath], EdgeTestConfig.func_bytes_budget):
+            if not evict_next([func_dirpath]):
+                break
+
+        if EdgeTestConfig.total_case_count_budget is not None or EdgeTestConfig.total_bytes_budget is not None:
+            self.scan_all()
+            while exceeds(self.total_count, EdgeTestConfig.total_case_count_budget) \
+                    or exceeds(self.total_bytes, EdgeTestConfig.total_bytes_budget):
+                if not evict_next(list(self.func_entries)):
+                    break
+
+        for evicted_func_dirpath, md5hashes in evicted_by_func.items():
+            if evicted_func_dirpath == func_dirpath:
+                func_coverage_data = coverage_data
+            else:
+                func_coverage_data = load_coverage_data(evicted_func_dirpath)
+            for md5hash in md5hashes:
+                func_coverage_data.get('case_coverage', {}).pop(md5hash, None)
+            if evicted_func_dirpath != func_dirpath:
+                with open(os.path.join(evicted_func_dirpath, 'coverage.json'), 'w') as f:
+                    json.dump(func_coverage_data, f, indent=4)
+
+        return evicted_by_func.get(func_dirpath, [])
+
+    def select_victim(self, func_dirpaths: List[str], keep: Optional[str]) -> Optional[Tuple[str, str]]:
+        """
+        Return (func_dirpath, md5hash) of the case to evict next per EdgeTestConfig.eviction_policy.
+
+            'largest'   -- the case with the most bytes.
+            'oldest'    -- the case saved least recently.
+            'redundant' -- the largest case whose lines are all executed by other cases of its
+                           function, per 'case_coverage' in coverage.json, else the oldest case.
+                           Cases without recorded lines are treated as redundant.
+        """
+        policy = EdgeTestConfig.eviction_policy
+        if policy not in ('largest', 'oldest', 'redundant'):
+            raise ValueError(f"Unknown eviction_policy '{policy}'.")
+
+        candidates = [
+            (func_dirpath, md5hash, entry)
+                for func_dirpath in func_dirpaths
+                    for md5hash, entry in self.entries(func_dirpath).items()
+                        if md5hash != keep
+            ]
+        if not candidates:
+            return None
+
+        if policy == 'redundant':
+            redundant_candidates = [c for c in candidates if self.is_redundant(c[0], c[1])]
+            if redundant_candidates:
+                candidates = redundant_candidates
+                policy = 'largest'
             else:
-                coverage_data = {'code_coverage': [], 'output_coverage': {'tested': None}}
+                policy = 'oldest'
 
-            # Analyze output differences
-            diff_report, coverage_data['output_coverage']['tested'] = compare_objects(
-                coverage_data['output_coverage'].get('result', None),
-                result,
-                coverage_data['output_coverage'].get('tested', None)
-            )
+        if policy == 'largest':
+            victim = max(candidates, key=lambda c: (c[2]['bytes'], -c[2]['mtime']))
+        else:
+            victim = min(candidates, key=lambda c: c[2]['mtime'])
 
-            # Update code coverage
-            coverage_data['code_coverage'] = list(set(coverage_data['code_coverage']).union(set(executed_lines_in_function)))
+        return victim[0], victim[1]
 
-            # Check if new test case should be saved
-            
-            should_save_test = False
-            if len(os.listdir(func_dirpath)) < EdgeTestConfig.test_count_limit + 1:
-                should_save_test = True
-            elif set(executed_lines_in_function).difference(set(coverage_data['code_coverage'])):
-                should_save_test = True
-            elif contains_false(coverage_data['output_coverage'].get("tested")):
-                should_save_test = True
-             
-            if should_save_test:
-                # Save test data
-                with open(testcase_path, 'w') as f:
-                    f.write(flattened_data)
-
-                # Save updated coverage data
-                with open(coverage_path, 'w') as f:
-                    json.dump(coverage_data, f, indent=4)
 
+# index of the test case store for this process.
+_case_store = CaseStore()
+
+
+def exceeds(value: int, budget: Optional[int]) -> bool:
+    """ Return True if budget is set and value is over it. """
+    return budget is not None and value > budget
+
+
+def load_coverage_data(func_dirpath: str) -> Dict[str, Any]:
+    """ Load coverage.json of the function at func_dirpath, or return empty coverage data. """
+    coverage_path = os.path.join(func_dirpath, 'coverage.json')
+    if os.path.exists(coverage_path):
+        with open(coverage_path, 'r') as f:
+            return json.load(f)
+    return {'code_coverage': [], 'output_coverage': {'tested': None}}
+
+
+def is_saturated(func: Callable, func_dirpath: str) -> bool:
+    """ Return True if record_test_case() would not save another case of func, as the
+        test count limit is reached, every line of func has been executed by a case and
+        no part of the output remains untested.
+    """
+    if _case_store.num_cases(func_dirpath) < EdgeTestConfig.test_count_limit:
+        return False
+
+    coverage_data = load_coverage_data(func_dirpath)
+    if contains_false(coverage_data['output_coverage'].get('tested')):
+        return False
+
+    return function_code_lines(func).issubset(coverage_data['code_coverage'])
+
+
+@lru_cache(maxsize=None)
+def function_code_lines(func: Callable) -> frozenset:
+    """ Return the lines of func, including nested functions and comprehensions, that have
+        bytecode and so can be reported by coverage. The first line, of the def statement or
+        decorator, is excluded, as it executes when the function is defined, not called.
+    """
+    code_lines = set()
+    code_objects = [func.__code__]
+    while code_objects:
+        code = code_objects.pop()
+        code_lines.update(line for _, line in dis.findlinestarts(code) if line is not None)
+        code_objects.extend(const for const in code.co_consts if inspect.iscode(const))
+
+    code_lines.discard(func.__code__.co_firstlineno)
+    return frozenset(code_lines)
+
+
+def is_capturable_iterator(value: Any) -> bool:
+    """ Return True if value is a generator that must be consumed to be captured.
+
+        Other iterators, such as file objects, csv readers and database cursors, are
+        not wrapped, as the caller would lose their API. They are captured as returned.
+    """
+    return inspect.isgenerator(value)
+
+
+class IteratorSummary:
+    """
+    Bounded summary of the items produced by an iterator.
+
+    The first head_limit items are kept (deep copied, as they may be mutated by
+    the consumer), all items are counted, and items beyond the head are folded into
+    a rolling md5 hash of their pickle encoding, or of their repr if they cannot be
+    pickled. Memory use is therefore bounded regardless of the length of the stream.
+    """
+
+    def __init__(self, head_limit: int):
+        self.head_limit = head_limit
+        self.head: List[Any] = []
+        self.count = 0
+        self.tail_hash = hashlib.md5()
+
+    def add(self, item: Any):
+        if self.count < self.head_limit:
+            self.head.append(copy.deepcopy(item))
+        else:
+            # pickle is much cheaper per item than jsonpickle, which matters for long streams.
+            try:
+                encoded_item = pickle.dumps(item, protocol=4)
+            except Exception:
+                encoded_item = repr(item).encode("utf-8")
+            self.tail_hash.update(encoded_item)
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'head_limit':   self.head_limit,
+            'head':         self.head,
+            'count':        self.count,
+            'tail_md5':     self.tail_hash.hexdigest(),
+            }
+
+
+def summarize_iterator(iterable: Iterable, head_limit: int) -> Dict[str, Any]:
+    """ Consume iterable and return its IteratorSummary as a dict.
+        Used during replay to produce the same summary that was saved.
+    """
+    summary = IteratorSummary(head_limit)
+    for item in iterable:
+        summary.add(item)
+    return summary.to_dict()
+
+
+def capture_iterator(iterator: Generator, cov, cassette: 'Cassette', on_complete: Callable[[Dict[str, Any]], Any]):
+    """
+    Generator that passes through the items of a generator while summarizing them.
+
+    Coverage and the I/O cassette are resumed only while the wrapped iterator is advanced,
+    so the lines and I/O calls of a generator body are collected across the whole iteration
+    without also tracing the consumer. When the iterator is exhausted, on_complete is called with the summary.
+    If the consumer abandons the iteration early, no test case is recorded, since
+    replay could not reproduce a partial consumption, and the wrapped generator is closed.
+
+    Note that send() and throw() are not forwarded to the wrapped generator. Once the
+    function is saturated (see is_saturated()), save_edge_tests() returns its generators
+    unwrapped, so this per-item cost is no longer paid.
+    """
+    summary = IteratorSummary(EdgeTestConfig.iterator_head_limit)
+
+    try:
+        while True:
+            # the context variable is set directly, as a context manager per item is costly on long streams.
+            token = _active_cassettes.set(_active_cassettes.get() + (cassette,))
+            cov.start()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                cov.stop()
+                _active_cassettes.reset(token)
+
+            summary.add(item)
+            yield item
+    finally:
+        # runs the finally blocks of the wrapped generator if the consumer stops early.
+        iterator.close()
+
+    on_complete(summary.to_dict())
+
+
+# the stack of cassettes active in the current thread or async task. The innermost replaying
+# cassette serves intercepted I/O calls; otherwise the real call is made and recorded by every
+# cassette, so that outer captured functions can also be replayed offline. A context variable
+# keeps I/O of concurrent requests out of each other's cassettes.
+_active_cassettes: contextvars.ContextVar = contextvars.ContextVar('edge_test_active_cassettes', default=())
+
+# dotted paths already patched by install_io_interceptors().
+_installed_io_callables: Dict[str, Callable] = {}
+
+
+class Cassette:
+    """
+    Responses of intercepted I/O calls made while a captured function runs.
+
+    During capture, each call of a registered I/O callable is passed through and its
+    result (or exception) is appended to the cassette, keyed by the name of the callable
+    and a hash of its arguments. The cassette is saved as {hexdigest}.cassette next to
+    the test case. During replay, the cassette is loaded and calls with the same key are
+    answered from it in the order recorded, without performing the I/O. If a key is
+    called more times than recorded, the last response is repeated. unplayed() lists the
+    recorded calls that replay did not make.
+
+    Responses must be deep-copyable and serializable by jsonpickle. Streaming responses,
+    such as a botocore StreamingBody or an open HTTP response, are not supported. If a
+    response cannot be recorded, the cassette is marked unrecordable, the call still returns
+    the real response, and the test case is not saved.
+    """
+
+    def __init__(self, interactions: Optional[List[Dict[str, Any]]]=None, replay: bool=False):
+        self.interactions: List[Dict[str, Any]] = interactions or []
+        self.replay = replay
+
+        # key -> indexes of the interactions with that key, in the order recorded.
+        self._responses: Dict[str, List[int]] = {}
+        for interaction_idx, interaction in enumerate(self.interactions):
+            self._responses.setdefault(interaction['key'], []).append(interaction_idx)
+        self._played = set()
+
+        # the reason the I/O of the captured call could not be recorded, if any.
+        self.unrecordable: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        import jsonpickle
+
+        with open(path, 'r') as f:
+            cassette_data = jsonpickle.decode(f.read(), keys=True, on_missing='error')
+
+        return cls(cassette_data['interactions'], replay=True)
+
+    def save(self, path: str):
+        import jsonpickle
+
+        # encoded before the file is opened, so a response that cannot be encoded leaves no file.
+        flattened_cassette = jsonpickle.encode({'interactions': self.interactions}, keys=True, use_base85=True, indent=4)
+        with open(path, 'w') as f:
+            f.write(flattened_cassette)
+
+    @contextlib.contextmanager
+    def active(self):
+        token = _active_cassettes.set(_active_cassettes.get() + (self,))
+        try:
+            yield self
+        finally:
+            _active_cassettes.reset(token)
+
+    def record(self, name: str, key: str, result: Any=None, exception: Optional[BaseException]=None):
+        interaction = {'name': name, 'key': key}
+        if exception is not None:
+            interaction['exception'] = exception
+        else:
+            try:
+                # the caller may mutate the response after it is returned.
+                interaction['result'] = copy.deepcopy(result)
+            except Exception as exc:
+                # such as responses holding locks, sockets or generators.
+                self.mark_unrecordable(f"response of '{name}' cannot be copied: {exc!r}")
+                return
+        self.interactions.append(interaction)
+
+    def mark_unrecordable(self, reason: str):
+        """ Record that the I/O of the captured call cannot be replayed, keeping the first reason. """
+        if self.unrecordable is None:
+            self.unrecordable = reason
+
+    def io_names(self) -> List[str]:
+        """ Return the names of the I/O callables recorded in the cassette. """
+        return sorted({interaction['name'] for interaction in self.interactions})
+
+    def play(self, name: str, key: str) -> Any:
+        responses = self._responses.get(key)
+        if not responses:
+            raise KeyError(f"No recorded response for I/O call '{name}' (key {key}) in cassette.")
+
+        interaction_idx = responses.pop(0) if len(responses) > 1 else responses[0]
+        self._played.add(interaction_idx)
+        interaction = self.interactions[interaction_idx]
+
+        if 'exception' in interaction:
+            raise interaction['exception']
+        return copy.deepcopy(interaction['result'])
+
+    def played(self) -> List[Dict[str, Any]]:
+        """ Return the recorded interactions that have been played, in the order recorded. """
+        return [interaction for interaction_idx, interaction in enumerate(self.interactions)
+                    if interaction_idx in self._played]
+
+    def unplayed(self) -> List[Dict[str, Any]]:
+        """ Return the recorded interactions that have not been played. """
+        return [interaction for interaction_idx, interaction in enumerate(self.interactions)
+                    if interaction_idx not in self._played]
+
+
+def cassette_path_for(testcase_path: str) -> str:
+    """ Return the path of the cassette saved with the test case at testcase_path. """
+    return f"{os.path.splitext(testcase_path)[0]}.cassette"
+
+
+def io_call_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """ Return the md5 hash identifying a call of the I/O callable name with args and kwargs. """
+    import jsonpickle
+
+    flattened_call = jsonpickle.encode([name, list(args), kwargs], keys=True, unpicklable=False, use_base85=True)
+    return hashlib.md5(flattened_call.encode("utf-8")).hexdigest()
+
+
+def intercept_io(name: Optional[str]=None, skip_self: bool=False):
+    """
+    Decorator for I/O callables whose responses are recorded into and replayed from cassettes.
+
+    When no cassette is active, the decorated function is simply called, so the overhead
+    outside of capture and replay is a single check.
+
+    Args:
+        name (str, optional): name used to identify the callable in the cassette.
+            Defaults to the module and qualified name of the function.
+        skip_self (bool): if True, the first argument (self) is excluded from the key,
+            as it is for methods of client objects that are not reproducible.
+
+    Example:
+        @intercept_io()
+        def read_s3_object(bucket, key):
+            ...
+    """
+
+    def decorator(func):
+        io_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            active_cassettes = _active_cassettes.get()
+            if not active_cassettes:
+                return func(*args, **kwargs)
+
+            key_args = args[1:] if skip_self else args
+
+            for cassette in reversed(active_cassettes):
+                if cassette.replay:
+                    return cassette.play(io_name, io_call_key(io_name, key_args, kwargs))
+
+            # recording must not break the call being captured, so failures only mark the cassettes.
+            try:
+                key = io_call_key(io_name, key_args, kwargs)
+            except Exception as exc:
+                key = None
+                for cassette in active_cassettes:
+                    cassette.mark_unrecordable(f"arguments of '{io_name}' cannot be encoded: {exc!r}")
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                if key is not None:
+                    for cassette in active_cassettes:
+                        cassette.record(io_name, key, exception=exc)
+                raise
+
+            if key is not None:
+                for cassette in active_cassettes:
+                    cassette.record(io_name, key, result=result)
             return result
-        
+
+        # marks the callable as intercepted, so that it is not wrapped again.
+        wrapper.__edge_io_name__ = io_name
         return wrapper
-    
+
     return decorator
 
 
+def register_io_callable(target: str):
+    """ Add the dotted path target to EdgeTestConfig.io_callables and install its interceptor. """
+    if target not in EdgeTestConfig.io_callables:
+        EdgeTestConfig.io_callables.append(target)
+    install_io_interceptors()
+
+
+def install_io_interceptors(targets: Optional[Iterable[str]]=None, skip_missing: bool=False) -> List[str]:
+    """
+    Replace each target callable with an intercept_io() wrapper.
+
+    Targets are dotted paths to a module attribute or to a method of a class. Modules that
+    bind the callable with 'from module import name' before it is installed keep the original,
+    so targets are installed by EdgeTestConfig.enable() and register_io_callable(), which
+    should be called before importing the code that uses them. Otherwise, decorate them directly.
+    Callables already decorated with intercept_io() are not wrapped again.
+
+    Args:
+        targets (iterable of str, optional): dotted paths, default EdgeTestConfig.io_callables.
+        skip_missing (bool): if True, targets that cannot be found are skipped rather than
+            raising ValueError, as for the names in a cassette, which include functions
+            decorated with intercept_io() that are not module attributes.
+
+    Returns the targets newly installed by this call.
+    """
+    newly_installed = []
+    for target in (EdgeTestConfig.io_callables if targets is None else targets):
+        if target in _installed_io_callables:
+            continue
+
+        try:
+            owner, attr_name = resolve_dotted_path(target)
+        except ValueError:
+            if skip_missing:
+                continue
+            raise
+        original = inspect.getattr_static(owner, attr_name)
+
+        if hasattr(original, '__edge_io_name__'):
+            continue
+
+        if isinstance(original, (staticmethod, classmethod)):
+            raise ValueError(f"Cannot intercept '{target}': static and class methods are not supported.")
+
+        is_method = inspect.isclass(owner)
+        setattr(owner, attr_name, intercept_io(name=target, skip_self=is_method)(original))
+        _installed_io_callables[target] = original
+        newly_installed.append(target)
+
+    return newly_installed
+
+
+def resolve_dotted_path(target: str) -> Tuple[Any, str]:
+    """ Given a dotted path like 'package.module.Class.method', import the longest
+        importable module prefix and return the owner object and attribute name.
+    """
+    parts = target.split('.')
+
+    for split_idx in range(len(parts) - 1, 0, -1):
+        try:
+            owner = importlib.import_module('.'.join(parts[:split_idx]))
+        except ImportError:
+            continue
+
+        for attr_name in parts[split_idx:-1]:
+            owner = getattr(owner, attr_name, None)
+        if owner is None or not hasattr(owner, parts[-1]):
+            break
+        return owner, parts[-1]
+
+    raise ValueError(f"I/O callable '{target}' not found.")
+
+
 def contains_false(value: Any) -> bool:
     """
     Recursively checks if the given value contains any False boolean.
@@ -294,6 +993,25 @@ def contains_false(value: Any) -> bool:
     return False
 
    
+def count_true(value: Any) -> int:
+    """
+    Recursively counts the True booleans in the given value, such as a tested structure.
+
+    Args:
+    value (Any): The value to check. Can be a dict, list, or bool.
+
+    Returns:
+    int: The number of nested values that are True.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    elif isinstance(value, dict):
+        return sum(count_true(v) for v in value.values())
+    elif isinstance(value, list):
+        return sum(count_true(v) for v in value)
+    return 0
+
+
 def get_executed_lines(cov, func):
     """ Return the lines executed in the function of interest.
     
@@ -363,7 +1081,7 @@ def apply_test_cases():
             print(f"# Running edge tests for {module_dirname}/{function_dirname}, {len(case_files)} tests found.")
         
             for case_file in case_files:
-                if not case_file.endswith('.json') and case_file != 'coverage.json':
+                if not case_file.endswith('.json') or case_file == 'coverage.json':
                     continue
             
                 #s3utils.close_s3_connections()
@@ -403,13 +1121,19 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
     
     print(f"- Testing '{module_name}.{func_name}'\n   - Test File: '{edge_test_path}'")
     
-    # Find the module file
-    module_file = importlib.util.find_spec(module_name).origin
-
-    # Import the module dynamically
-    spec = importlib.util.spec_from_file_location(module_name, module_file)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    # serve registered I/O calls from the cassette recorded with the case, if any.
+    cassette = None
+    if 'cassette' in case_data:
+        cassette = Cassette.load(os.path.join(os.path.dirname(edge_test_path), case_data['cassette']))
+
+    # installed before the module is loaded, so that 'from module import name' binds the interceptors.
+    # The callables recorded in the cassette are installed too, as the io_callables that were
+    # configured during capture may not be configured when replaying.
+    install_io_interceptors()
+    if cassette:
+        install_io_interceptors(cassette.io_names(), skip_missing=True)
+
+    module = load_module(module_name)
     
     if 'args.argsdict' in state:
         args.argsdict = state['args.argsdict']
@@ -420,11 +1144,17 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
     # Get the function dynamically
     function = getattr(module, func_name)
 
+    cassette_context = cassette.active() if cassette else contextlib.nullcontext()
+
 #    import io
 #    f = io.StringIO()
 #    with contextlib.redirect_stdout(f):
         # Call the function with the saved inputs
-    actual_result = function(*pre_args, **pre_kwargs)
+    with cassette_context:
+        actual_result = function(*pre_args, **pre_kwargs)
+        if case_data.get('result_type') == 'iterator':
+            # compare the same bounded summary that was saved during capture.
+            actual_result = summarize_iterator(actual_result, expected_result['head_limit'])
 #    stdout_str = f.getvalue()
     stdout_str = ''
 
@@ -435,13 +1165,20 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
     # self.assertEqual(result, expected_output)
     # self.assertEqual(pre_args, post_args)
     # self.assertEqual(pre_kwargs, post_kwargs)
-    result_report   = compare_objects(expected_result, actual_result)
-    args_report     = compare_objects(expected_post_args, actual_post_args)
-    kwargs_report   = compare_objects(expected_post_kwargs, actual_post_kwargs)
-    
+    result_report   = difference_report(expected_result, actual_result)
+    args_report     = difference_report(expected_post_args, actual_post_args)
+    kwargs_report   = difference_report(expected_post_kwargs, actual_post_kwargs)
+
+    # recorded I/O calls that were not replayed were likely made live instead.
+    cassette_report = ''
+    if cassette:
+        cassette_report = "\n".join(f"Unplayed {interaction['name']} (key {interaction['key']})"
+                                        for interaction in cassette.unplayed())
+
     if not (result_report or 
             args_report or  
-            kwargs_report
+            kwargs_report or
+            cassette_report
         ):
         print(f"   - OK: Result matches expected output. stdout not compared: {len(stdout_str)} chars.\n")
         return True
@@ -450,8 +1187,9 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
         print(f"- expected_post_args == actual_post_args?     {bool(not args_report)}")
         print(f"- expected_post_kwargs == actual_post_kwargs? {bool(not kwargs_report)}")
         print(f"- actual_result == expected_result?           {bool(not result_report)}")
+        print(f"- all cassette I/O calls replayed?            {bool(not cassette_report)}")
         if print_details:
-            if not args_report:
+            if args_report:
                 # print(f"### expected_post_args:\n{  pprint.pformat(expected_post_args, indent=4, sort_dicts=False)}")
                 # print(f"### actual_post_args:\n{    pprint.pformat(actual_post_args, indent=4, sort_dicts=False)}\n\n")
                 print(f"### post_args difference_report: expected -> actual\n{args_report}\n")
@@ -463,6 +1201,8 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
                 # print(f"### expected_result:\n{     pprint.pformat(expected_result, indent=4, sort_dicts=False)}\n")
                 # print(f"### actual_result:\n{       pprint.pformat(actual_result, indent=4, sort_dicts=False)}\n")
                 print(f"### result difference_report: expected -> actual\n{result_report}\n")
+            if cassette_report:
+                print(f"### cassette I/O calls not replayed\n{cassette_report}\n")
                 
         if break_on_error:
             # this breakpoint lets the developer inspect the variables.
@@ -471,14 +1211,394 @@ def apply_edge_test_at_path(edge_test_path: str, break_on_error: bool=False, pri
     return False
     
     
+def expand_test_cases(
+        module_name: str,
+        func_name: str,
+        max_rounds: int=3,
+        processes: Optional[int]=None,
+        live_io: bool=False,
+        ) -> int:
+    """
+    Coverage-guided mutation of the captured test cases of a function.
+
+    The pre_args and pre_kwargs of each captured case are mutated one position at a
+    time (see generate_input_mutants()) and each mutant is run in a process pool with
+    the same line collector used by save_edge_tests. A mutant is kept only if it
+    executes lines of the function not yet in coverage.json, or if its result differs
+    from its seed in a part of the output that has not varied before, per the 'tested'
+    structure kept in 'mutation_output_coverage' of coverage.json, which is updated. Kept mutants are
+    saved as regular test cases, with 'mutated_from' naming the seed case, and are used
+    as seeds for the next round. Rounds stop when one adds no cases or after max_rounds.
+
+    Mutants that raise an exception, or run longer than EdgeTestConfig.mutant_timeout
+    seconds, are discarded. If the seed case has an I/O cassette, the mutant is run against
+    it, so mutants that make unrecorded I/O calls are discarded rather than performing the
+    I/O. Seeds without a cassette are skipped unless live_io is True, as their mutants could
+    perform any I/O of the function, including writes.
+
+    Each worker loads the module once (see init_mutant_worker()), with capture disabled so
+    that decorated callees do not save cases of their own.
+
+    Args:
+        module_name (str): module of the function, as in the test case folder.
+        func_name (str): name of the function.
+        max_rounds (int): maximum number of rounds of mutation.
+        processes (int, optional): number of worker processes, default is the cpu count.
+        live_io (bool): if True, also mutate seeds without a cassette, such as cases of
+            pure functions, running their mutants without I/O interception.
+
+    Returns:
+        int: the number of test cases saved.
+
+    Example:
+        # run from a script guarded by if __name__ == '__main__', as the pool may spawn processes.
+        edge_test_utils.expand_test_cases('my_module', 'my_function')
+    """
+    import jsonpickle
+
+    func_dirpath = os.path.join(EdgeTestConfig.test_cases_folder, module_name, func_name)
+
+    coverage_path = os.path.join(func_dirpath, 'coverage.json')
+    coverage_data = load_coverage_data(func_dirpath)
+    covered_lines = set(coverage_data['code_coverage'])
+
+    seeds = []
+    for case_file in sorted(os.listdir(func_dirpath)):
+        if not case_file.endswith('.json') or case_file == 'coverage.json':
+            continue
+        with open(os.path.join(func_dirpath, case_file), 'r') as f:
+            seeds.append((case_file, jsonpickle.decode(f.read(), keys=True, on_missing='error')))
+
+    num_cases = len(seeds)
+    if not live_io:
+        seeds = [(seed_file, seed) for seed_file, seed in seeds if 'cassette' in seed]
+
+    print(f"# Expanding edge tests for {module_name}/{func_name} from {len(seeds)} of {num_cases} cases.")
+
+    # the cassettes of later seeds hold only calls played from these, so their names are known now.
+    io_names = set()
+    for seed_file, seed in seeds:
+        if 'cassette' in seed:
+            io_names.update(Cassette.load(os.path.join(func_dirpath, seed['cassette'])).io_names())
+    worker_args = (module_name, list(EdgeTestConfig.io_callables), sorted(io_names), live_io)
+
+    # kept apart from 'output_coverage', which record_test_case() recomputes on each capture.
+    output_tested = coverage_data.get('mutation_output_coverage', {}).get('tested')
+    num_saved = 0
+
+    for round_idx in range(max_rounds):
+
+        tasks = {}
+        for seed_file, seed in seeds:
+            mutants = generate_input_mutants(seed['pre_args'], seed['pre_kwargs'])
+            for mutant_idx, (mutant_args, mutant_kwargs) in enumerate(mutants):
+                if mutant_idx >= EdgeTestConfig.mutants_per_case_limit:
+                    break
+
+                # same fields, and so the same hash, as a case captured with these inputs.
+                test_data = {field: seed[field] for field in ('module_name', 'func_name', 'func_def', 'docstring')}
+                test_data['pre_args'] = mutant_args
+                test_data['pre_kwargs'] = mutant_kwargs
+                if 'state' in seed:
+                    test_data['state'] = seed['state']
+
+                flattened_data_no_result = jsonpickle.encode(test_data, keys=True, use_base85=True, indent=4)
+                md5hash = hashlib.md5(flattened_data_no_result.encode("utf-8")).hexdigest()
+                if md5hash in tasks or os.path.exists(os.path.join(func_dirpath, f"{md5hash}.json")):
+                    continue
+
+                seed_cassette_path = os.path.join(func_dirpath, seed['cassette']) if 'cassette' in seed else None
+
+                run_args = (func_name, flattened_data_no_result, seed_cassette_path, EdgeTestConfig.iterator_head_limit)
+                tasks[md5hash] = (seed_file, seed, test_data, run_args)
+
+        outcomes = run_mutants([task[-1] for task in tasks.values()], worker_args, processes)
+
+        new_seeds = []
+        for (md5hash, (seed_file, seed, test_data, _)), outcome in zip(tasks.items(), outcomes):
+            if outcome is None:
+                continue
+
+            post_data = jsonpickle.decode(outcome['flattened_post_data'], keys=True, on_missing='error')
+
+            new_lines = set(outcome['executed_lines']).difference(covered_lines)
+
+            num_tested = count_true(output_tested)
+            _, output_tested = compare_objects(seed['result'], post_data['result'], output_tested)
+            adds_output_variation = count_true(output_tested) > num_tested
+
+            if not (new_lines or adds_output_variation):
+                continue
+
+            covered_lines.update(new_lines)
+
+            test_data.update(post_data)
+            test_data['mutated_from'] = seed_file
+
+            testcase_path = os.path.join(func_dirpath, f"{md5hash}.json")
+            if outcome['flattened_interactions']:
+                interactions = jsonpickle.decode(outcome['flattened_interactions'], keys=True, on_missing='error')
+                if interactions:
+                    cassette_path = cassette_path_for(testcase_path)
+                    Cassette(interactions).save(cassette_path)
+                    test_data['cassette'] = os.path.basename(cassette_path)
+
+            with open(testcase_path, 'w') as f:
+                f.write(jsonpickle.encode(test_data, keys=True, use_base85=True, indent=4))
+
+            coverage_data.setdefault('case_coverage', {})[md5hash] = outcome['executed_lines']
+            _case_store.add(func_dirpath, md5hash, outcome['executed_lines'])
+
+            new_seeds.append((md5hash, test_data))
+
+        # enforced once the round is over, as the pending mutants use the cassettes of their seeds.
+        evicted = _case_store.enforce_budgets(func_dirpath, None, coverage_data)
+        saved_md5hashes = [md5hash for md5hash, _ in new_seeds]
+        new_seeds = [(f"{md5hash}.json", test_data) for md5hash, test_data in new_seeds if md5hash not in evicted]
+        if not live_io:
+            # a mutant that made no I/O calls has no cassette, so its own mutants would run live.
+            new_seeds = [(seed_file, seed) for seed_file, seed in new_seeds if 'cassette' in seed]
+
+        num_round_saved = sum(1 for md5hash in saved_md5hashes if md5hash not in evicted)
+        print(f"   - Round {round_idx + 1}: {len(tasks)} mutants run, {num_round_saved} saved.")
+
+        num_saved += num_round_saved
+        if not new_seeds:
+            break
+        seeds = new_seeds
+
+    coverage_data['code_coverage'] = sorted(covered_lines)
+    coverage_data['mutation_output_coverage'] = {'tested': output_tested}
+    with open(coverage_path, 'w') as f:
+        json.dump(coverage_data, f, indent=4)
+
+    return num_saved
+
+
+def run_mutants(
+        run_args_list: List[tuple],
+        worker_args: tuple,
+        processes: Optional[int]=None,
+        ) -> List[Optional[Dict[str, Any]]]:
+    """
+    Run run_mutant() for each tuple of args in a process pool, returning the outcomes in order.
+    Each worker is first prepared by init_mutant_worker() with worker_args.
+
+    A mutant still running EdgeTestConfig.mutant_timeout seconds after its outcome is awaited
+    has its outcome set to None. As a stuck worker cannot be stopped alone, the pool is then
+    terminated, and the mutants that had not finished are run in a new pool.
+    """
+    import multiprocessing
+
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(run_args_list)
+    pending_idxs = list(range(len(run_args_list)))
+
+    while pending_idxs:
+        pool = multiprocessing.Pool(processes, initializer=init_mutant_worker, initargs=worker_args)
+        try:
+            async_results = [(idx, pool.apply_async(run_mutant, run_args_list[idx])) for idx in pending_idxs]
+            pending_idxs = []
+            timed_out = False
+
+            # tasks start in the order submitted, so each one awaited here is already running.
+            for idx, async_result in async_results:
+                if timed_out:
+                    if async_result.ready():
+                        outcomes[idx] = async_result.get()
+                    else:
+                        pending_idxs.append(idx)
+                    continue
+                try:
+                    outcomes[idx] = async_result.get(timeout=EdgeTestConfig.mutant_timeout)
+                except multiprocessing.TimeoutError:
+                    print(f"   - Mutant {idx} discarded after {EdgeTestConfig.mutant_timeout} seconds.")
+                    timed_out = True
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return outcomes
+
+
+def load_module(module_name: str):
+    """ Load a fresh copy of the module, so that it binds the currently installed I/O interceptors. """
+    # Find the module file
+    module_file = importlib.util.find_spec(module_name).origin
+
+    # Import the module dynamically
+    spec = importlib.util.spec_from_file_location(module_name, module_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+# the module under test in a worker process of expand_test_cases(), set by init_mutant_worker().
+_mutant_module = None
+
+
+def init_mutant_worker(module_name: str, io_callables: List[str], io_names: List[str], live_io: bool):
+    """ Prepare a worker process of expand_test_cases(), loading the module under test once.
+
+        The config is passed explicitly, as spawned workers do not share it. Capture is
+        disabled, as forked workers inherit it, and decorated callees would save cases.
+        The I/O interceptors, including those of the callables in the seed cassettes, are
+        installed before the module is loaded, and unless live_io, it is loaded with an
+        empty replaying cassette active, so intercepted I/O performed on import fails the
+        load instead of running live. Then every mutant of the worker returns None.
+    """
+    global _mutant_module
+
+    EdgeTestConfig.enable_edge_tests = False
+    EdgeTestConfig.io_callables = io_callables
+    install_io_interceptors()
+    install_io_interceptors(io_names, skip_missing=True)
+
+    load_context = contextlib.nullcontext() if live_io else Cassette(replay=True).active()
+    try:
+        with load_context:
+            _mutant_module = load_module(module_name)
+    except Exception as exc:
+        print(f"   - Module {module_name} could not be loaded in a worker: {exc!r}")
+        _mutant_module = None
+
+
+def run_mutant(
+        func_name: str,
+        flattened_data_no_result: str,
+        cassette_path: Optional[str],
+        iterator_head_limit: int,
+        ) -> Optional[Dict[str, Any]]:
+    """ Run one mutant in a worker process of expand_test_cases(), prepared by init_mutant_worker().
+
+        Returns the executed lines of the function, the jsonpickled post_args,
+        post_kwargs and result, and the jsonpickled cassette interactions it played,
+        or None if the function raised an exception or the module could not be loaded.
+    """
+    import coverage
+    import jsonpickle
+
+    # also set by init_mutant_worker(), but the worker must never save cases.
+    EdgeTestConfig.enable_edge_tests = False
+
+    if _mutant_module is None:
+        return None
+
+    test_data = jsonpickle.decode(flattened_data_no_result, keys=True, on_missing='error')
+    pre_args = test_data['pre_args']
+    pre_kwargs = test_data['pre_kwargs']
+    state = test_data.get('state', {})
+
+    if 'args.argsdict' in state:
+        from utilities import args
+        args.argsdict = state['args.argsdict']
+
+    # call the undecorated function so the worker does not capture cases itself.
+    function = inspect.unwrap(getattr(_mutant_module, func_name))
+
+    cassette = Cassette.load(cassette_path) if cassette_path else None
+    cassette_context = cassette.active() if cassette else contextlib.nullcontext()
+    post_data = {}
+
+    # no data file, as workers would otherwise share one.
+    cov = coverage.Coverage(data_file=None)
+    try:
+        with cassette_context:
+            cov.start()
+            try:
+                result = function(*pre_args, **pre_kwargs)
+                if is_capturable_iterator(result):
+                    result = summarize_iterator(result, iterator_head_limit)
+                    post_data['result_type'] = 'iterator'
+            finally:
+                cov.stop()
+        executed_lines_in_function = get_executed_lines(cov, function)
+    except Exception:
+        return None
+
+    post_data['post_args']      = list(pre_args)
+    post_data['post_kwargs']    = pre_kwargs
+    post_data['result']         = result
+
+    return {
+        'executed_lines':       executed_lines_in_function,
+        'flattened_post_data':  jsonpickle.encode(post_data, keys=True, use_base85=True),
+        # only the I/O calls the mutant made, so that its own replay plays all of them.
+        'flattened_interactions': jsonpickle.encode(cassette.played(), keys=True, use_base85=True) if cassette else None,
+        }
+
+
+def generate_input_mutants(pre_args: List[Any], pre_kwargs: Dict[str, Any]) -> Iterator:
+    """ Generate (args, kwargs) pairs in which a single positional or keyword argument
+        is replaced by one of its mutations from mutate_value().
+    """
+    for arg_idx, arg_value in enumerate(pre_args):
+        for mutated_value in mutate_value(arg_value):
+            mutant_args = list(pre_args)
+            mutant_args[arg_idx] = mutated_value
+            yield mutant_args, pre_kwargs
+
+    for kwarg_name, kwarg_value in pre_kwargs.items():
+        for mutated_value in mutate_value(kwarg_value):
+            mutant_kwargs = dict(pre_kwargs)
+            mutant_kwargs[kwarg_name] = mutated_value
+            yield list(pre_args), mutant_kwargs
+
+
+def mutate_value(value: Any, depth: int=0) -> List[Any]:
+    """
+    Return type-preserving mutations of value.
+
+    Scalars are replaced by boundary values and small perturbations, containers are
+    emptied, truncated and extended, and up to the first few elements of containers
+    are mutated recursively, down to a depth of 2. Other types are not mutated.
+
+    RECURSIVE
+    """
+    value_type = type(value)
+
+    if value_type is bool:
+        candidates = [not value]
+    elif value_type is int:
+        candidates = [0, 1, -1, value + 1, value - 1, -value]
+    elif value_type is float:
+        candidates = [0.0, 1.0, -1.0, value + 1.0, value - 1.0, -value, float('inf'), float('-inf')]
+    elif value_type in (str, bytes):
+        candidates = [value[:0], value[:1], value[:len(value) // 2], value + value[-1:]]
+        if value_type is str:
+            candidates.extend([f" {value} ", value.upper()])
+    elif value_type in (list, tuple):
+        candidates = [value[:0], value[:1], value[:-1], value + value[-1:]]
+        if depth < 2:
+            for idx in range(min(len(value), 3)):
+                for mutated_item in mutate_value(value[idx], depth + 1):
+                    candidates.append(value[:idx] + value_type([mutated_item]) + value[idx + 1:])
+    elif value_type is dict:
+        candidates = [{}]
+        for key in list(value.keys())[:5]:
+            candidates.append({k: v for k, v in value.items() if k != key})
+            if depth < 2:
+                for mutated_item in mutate_value(value[key], depth + 1):
+                    candidates.append({**value, key: mutated_item})
+    else:
+        candidates = []
+
+    mutations = []
+    for candidate in candidates:
+        if candidate != value and candidate not in mutations:
+            mutations.append(candidate)
+    return mutations
+
+
 def difference_report(expected_result, actual_result):
 
-    return "\n".join(compare_objects(obj1=expected_result, obj2=actual_result))
+    report_lines, _ = compare_objects(obj1=expected_result, obj2=actual_result)
+    return "\n".join(report_lines)
     
 
 # Helper functions for comparison
     
-def compare_objects(obj1: Any, obj2: Any, tested: Any, path: str = '') -> Tuple[List[str], Any]:
+def compare_objects(obj1: Any, obj2: Any, tested: Any = None, path: str = '') -> Tuple[List[str], Any]:
     """
     Compares two objects (dictionaries, lists, or scalar values) and provides a detailed difference report.
     
@@ -536,7 +1656,7 @@ def compare_dicts(dict1: Dict[str, Any], dict2: Dict[str, Any], tested: Dict[str
     
     RECURSIVE
     """
-    if tested is None:
+    if not isinstance(tested, dict):
         tested = {}
     report_lines: List[str] = []
     keys = list(dict1.keys()) + [k for k in dict2.keys() if k not in dict1]
@@ -574,7 +1694,7 @@ def compare_lists(list1: List[Any], list2: List[Any], tested: List[Any], path: s
     """
     report_lines: List[str] = []
     max_len = max(len(list1), len(list2))
-    if tested is None:
+    if not isinstance(tested, list):
         tested = [None] * max_len
     
     if len(tested) < max_len:
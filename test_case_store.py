@@ -0,0 +1,189 @@
+# test_case_store.py
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from utilities import edge_test_utils
+from utilities.edge_test_utils import EdgeTestConfig, CaseStore
+
+BUDGET_SETTINGS = (
+    'func_case_count_budget',
+    'func_bytes_budget',
+    'total_case_count_budget',
+    'total_bytes_budget',
+    'eviction_policy',
+    )
+
+
+class TestCaseStore(unittest.TestCase):
+    """
+    Unit tests for the CaseStore index and the eviction policies of the test case store.
+
+    Each test uses a temporary test_cases_folder with cases written directly, as
+        (test_cases_folder)/mod/(func)/(md5hash).json
+
+    Example:
+        To run the unit tests in this class, execute 'python -m unittest test_case_store.py'
+        from the command line.
+    """
+
+    def setUp(self):
+        self.saved_settings = {name: getattr(EdgeTestConfig, name) for name in BUDGET_SETTINGS}
+        self.saved_test_cases_folder = getattr(EdgeTestConfig, 'test_cases_folder', None)
+
+        self.test_cases_folder = tempfile.mkdtemp()
+        EdgeTestConfig.test_cases_folder = self.test_cases_folder
+        self.store = CaseStore()
+
+    def tearDown(self):
+        for name, value in self.saved_settings.items():
+            setattr(EdgeTestConfig, name, value)
+        EdgeTestConfig.test_cases_folder = self.saved_test_cases_folder
+        shutil.rmtree(self.test_cases_folder)
+
+    def func_dirpath(self, func_name: str) -> str:
+        return os.path.join(self.test_cases_folder, 'mod', func_name)
+
+    def write_case(self, func_name: str, md5hash: str, num_bytes: int, mtime: float,
+                   lines=None, cassette_bytes: int=0):
+        """ Write a case of num_bytes, with an optional cassette, and record its lines in coverage.json. """
+        func_dirpath = self.func_dirpath(func_name)
+        os.makedirs(func_dirpath, exist_ok=True)
+
+        testcase_path = os.path.join(func_dirpath, f"{md5hash}.json")
+        with open(testcase_path, 'w') as f:
+            f.write('x' * num_bytes)
+        os.utime(testcase_path, (mtime, mtime))
+        if cassette_bytes:
+            with open(edge_test_utils.cassette_path_for(testcase_path), 'w') as f:
+                f.write('c' * cassette_bytes)
+
+        coverage_data = edge_test_utils.load_coverage_data(func_dirpath)
+        if lines is not None:
+            coverage_data.setdefault('case_coverage', {})[md5hash] = lines
+        with open(os.path.join(func_dirpath, 'coverage.json'), 'w') as f:
+            json.dump(coverage_data, f)
+
+        return func_dirpath
+
+    def test_scan_counts_cases_and_bytes(self):
+        self.write_case('f', 'a', 100, 1000, cassette_bytes=50)
+        func_dirpath = self.write_case('f', 'b', 10, 1001)
+
+        self.assertEqual(self.store.num_cases(func_dirpath), 2)
+        self.assertEqual(self.store.func_bytes[func_dirpath], 160)
+        self.assertEqual(self.store.total_count, 2)
+        self.assertEqual(self.store.total_bytes, 160)
+
+    def test_evict_and_readd_bookkeeping(self):
+        self.write_case('f', 'a', 100, 1000, lines=[1, 2], cassette_bytes=50)
+        func_dirpath = self.write_case('f', 'b', 10, 1001, lines=[1])
+        self.store.entries(func_dirpath)
+
+        self.store.evict(func_dirpath, 'a')
+        self.assertFalse(os.path.exists(os.path.join(func_dirpath, 'a.json')))
+        self.assertFalse(os.path.exists(os.path.join(func_dirpath, 'a.cassette')))
+        self.assertEqual(self.store.num_cases(func_dirpath), 1)
+        self.assertEqual(self.store.func_bytes[func_dirpath], 10)
+        self.assertEqual((self.store.total_count, self.store.total_bytes), (1, 10))
+        self.assertEqual(self.store.func_line_counts[func_dirpath], {1: 1})
+
+        # saving a case again with the same hash replaces its entry.
+        self.write_case('f', 'b', 30, 1002)
+        self.store.add(func_dirpath, 'b', [3])
+        self.assertEqual((self.store.total_count, self.store.total_bytes), (1, 30))
+        self.assertEqual(self.store.func_line_counts[func_dirpath], {3: 1})
+
+        self.write_case('f', 'c', 5, 1003)
+        self.store.add(func_dirpath, 'c', [3, 4])
+        self.assertEqual((self.store.total_count, self.store.total_bytes), (2, 35))
+        self.assertEqual(self.store.func_line_counts[func_dirpath], {3: 2, 4: 1})
+
+    def test_select_victim_largest(self):
+        EdgeTestConfig.eviction_policy = 'largest'
+        self.write_case('f', 'a', 10, 1000)
+        self.write_case('f', 'b', 300, 1001)
+        func_dirpath = self.write_case('f', 'c', 20, 999)
+
+        self.assertEqual(self.store.select_victim([func_dirpath], None), (func_dirpath, 'b'))
+        self.assertEqual(self.store.select_victim([func_dirpath], 'b'), (func_dirpath, 'c'))
+
+    def test_select_victim_oldest(self):
+        EdgeTestConfig.eviction_policy = 'oldest'
+        self.write_case('f', 'a', 10, 1000)
+        self.write_case('f', 'b', 300, 1001)
+        func_dirpath = self.write_case('f', 'c', 20, 999)
+
+        self.assertEqual(self.store.select_victim([func_dirpath], None), (func_dirpath, 'c'))
+        self.assertEqual(self.store.select_victim([func_dirpath], 'c'), (func_dirpath, 'a'))
+
+    def test_select_victim_redundant(self):
+        EdgeTestConfig.eviction_policy = 'redundant'
+        # 'a' is the only case executing line 3, 'b' and 'c' are covered by the others.
+        self.write_case('f', 'a', 500, 1000, lines=[1, 2, 3])
+        self.write_case('f', 'b', 50, 1001, lines=[1, 2])
+        func_dirpath = self.write_case('f', 'c', 80, 1002, lines=[2])
+
+        self.assertFalse(self.store.is_redundant(func_dirpath, 'a'))
+        self.assertTrue(self.store.is_redundant(func_dirpath, 'b'))
+        # the largest of the redundant cases.
+        self.assertEqual(self.store.select_victim([func_dirpath], None), (func_dirpath, 'c'))
+
+    def test_select_victim_redundant_falls_back_to_oldest(self):
+        EdgeTestConfig.eviction_policy = 'redundant'
+        self.write_case('f', 'a', 500, 1001, lines=[1])
+        func_dirpath = self.write_case('f', 'b', 50, 1000, lines=[2])
+
+        self.assertEqual(self.store.select_victim([func_dirpath], None), (func_dirpath, 'b'))
+
+    def test_select_victim_unknown_policy(self):
+        EdgeTestConfig.eviction_policy = 'random'
+        func_dirpath = self.write_case('f', 'a', 10, 1000)
+
+        with self.assertRaises(ValueError):
+            self.store.select_victim([func_dirpath], None)
+
+    def test_enforce_func_count_budget_keeps_new_case(self):
+        EdgeTestConfig.eviction_policy = 'oldest'
+        EdgeTestConfig.func_case_count_budget = 2
+        self.write_case('f', 'a', 10, 1000, lines=[1])
+        self.write_case('f', 'b', 10, 1001, lines=[1])
+        func_dirpath = self.write_case('f', 'new', 10, 900, lines=[1])
+
+        coverage_data = edge_test_utils.load_coverage_data(func_dirpath)
+        evicted = self.store.enforce_budgets(func_dirpath, 'new', coverage_data)
+
+        self.assertEqual(evicted, ['a'])
+        self.assertEqual(sorted(self.store.entries(func_dirpath)), ['b', 'new'])
+        self.assertEqual(sorted(coverage_data['case_coverage']), ['b', 'new'])
+
+    def test_enforce_total_bytes_budget_updates_only_evicted_functions(self):
+        EdgeTestConfig.eviction_policy = 'oldest'
+        EdgeTestConfig.total_bytes_budget = 250
+        self.write_case('p', 'a', 100, 1000, lines=[1])
+        q_dirpath = self.write_case('q', 'b', 100, 2000, lines=[1])
+        r_dirpath = self.write_case('r', 'c', 100, 3000, lines=[1])
+
+        q_coverage_path = os.path.join(q_dirpath, 'coverage.json')
+        os.utime(q_coverage_path, (5, 5))
+
+        coverage_data = edge_test_utils.load_coverage_data(r_dirpath)
+        self.store.enforce_budgets(r_dirpath, 'c', coverage_data)
+
+        self.assertEqual(self.store.total_bytes, 200)
+        self.assertEqual(self.store.num_cases(self.func_dirpath('p')), 0)
+        self.assertEqual(edge_test_utils.load_coverage_data(self.func_dirpath('p'))['case_coverage'], {})
+        # q lost no case, so its coverage.json is not rewritten.
+        self.assertEqual(os.path.getmtime(q_coverage_path), 5)
+
+    def test_enforce_without_budgets_evicts_nothing(self):
+        func_dirpath = self.write_case('f', 'a', 10, 1000)
+
+        self.assertEqual(self.store.enforce_budgets(func_dirpath, None, {}), [])
+        self.assertEqual(self.store.num_cases(func_dirpath), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
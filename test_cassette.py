@@ -0,0 +1,268 @@
+# test_cassette.py
+
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import importlib
+import contextlib
+import unittest
+from utilities import edge_test_utils
+from utilities.edge_test_utils import EdgeTestConfig, Cassette, intercept_io
+
+IO_MODULE_NAME = 'edge_io_source'
+TARGET_MODULE_NAME = 'edge_cassette_target'
+
+IO_MODULE_SOURCE = '''
+import threading
+from utilities.edge_test_utils import intercept_io
+
+calls = []
+
+def fetch(key):
+    calls.append(key)
+    return {'key': key, 'size': len(key)}
+
+def open_stream(key):
+    calls.append(key)
+    return {'key': key, 'lock': threading.Lock()}
+
+class Client:
+    def get(self, key):
+        calls.append(key)
+        return key.upper()
+
+    @staticmethod
+    def ping():
+        return True
+
+@intercept_io()
+def decorated(key):
+    return key
+'''
+
+TARGET_MODULE_SOURCE = '''
+from utilities.edge_test_utils import save_edge_tests
+from edge_io_source import fetch, open_stream
+
+@save_edge_tests()
+def total_size(keys):
+    return sum(fetch(key)['size'] for key in keys)
+
+@save_edge_tests()
+def stream_key(key):
+    return open_stream(key)['key']
+'''
+
+
+class TestCassette(unittest.TestCase):
+    """
+    Unit tests for recording and replaying I/O calls with cassettes.
+
+    Each test uses a temporary test_cases_folder, and an I/O module and a target module
+    that imports from it, written to a temporary folder on sys.path, so that cases and
+    their cassettes are captured and replayed for real.
+
+    Example:
+        To run the unit tests in this class, execute 'python -m unittest test_cassette.py'
+        from the command line.
+    """
+
+    def setUp(self):
+        self.saved_enable_edge_tests = EdgeTestConfig.enable_edge_tests
+        self.saved_io_callables = list(EdgeTestConfig.io_callables)
+        self.saved_test_cases_folder = getattr(EdgeTestConfig, 'test_cases_folder', None)
+
+        self.temp_dirpath = tempfile.mkdtemp()
+        self.test_cases_folder = os.path.join(self.temp_dirpath, 'test_cases')
+        EdgeTestConfig.test_cases_folder = self.test_cases_folder
+
+        for module_name, source in ((IO_MODULE_NAME, IO_MODULE_SOURCE), (TARGET_MODULE_NAME, TARGET_MODULE_SOURCE)):
+            with open(os.path.join(self.temp_dirpath, f"{module_name}.py"), 'w') as f:
+                f.write(source)
+        sys.path.insert(0, self.temp_dirpath)
+        self.io_module = importlib.import_module(IO_MODULE_NAME)
+
+    def tearDown(self):
+        self.uninstall_io_interceptors()
+        EdgeTestConfig.enable_edge_tests = self.saved_enable_edge_tests
+        EdgeTestConfig.io_callables = self.saved_io_callables
+        EdgeTestConfig.test_cases_folder = self.saved_test_cases_folder
+        sys.path.remove(self.temp_dirpath)
+        for module_name in (IO_MODULE_NAME, TARGET_MODULE_NAME):
+            sys.modules.pop(module_name, None)
+        shutil.rmtree(self.temp_dirpath)
+
+    def uninstall_io_interceptors(self):
+        """ Restore the callables of the I/O module, as when replaying in a new process. """
+        for target in list(edge_test_utils._installed_io_callables):
+            if target.startswith(f"{IO_MODULE_NAME}."):
+                owner, attr_name = edge_test_utils.resolve_dotted_path(target)
+                setattr(owner, attr_name, edge_test_utils._installed_io_callables.pop(target))
+
+    def case_paths(self, func_name: str):
+        func_dirpath = os.path.join(self.test_cases_folder, TARGET_MODULE_NAME, func_name)
+        if not os.path.exists(func_dirpath):
+            return []
+        return [os.path.join(func_dirpath, name) for name in sorted(os.listdir(func_dirpath))
+                    if name.endswith('.json') and name != 'coverage.json']
+
+    def apply_case(self, case_path: str) -> bool:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return edge_test_utils.apply_edge_test_at_path(case_path)
+
+    def test_play_in_recorded_order_and_unplayed(self):
+        cassette = Cassette([
+            {'name': 'read', 'key': 'k1', 'result': 1},
+            {'name': 'read', 'key': 'k1', 'result': 2},
+            {'name': 'write', 'key': 'k2', 'exception': ValueError('denied')},
+            ], replay=True)
+
+        self.assertEqual(cassette.play('read', 'k1'), 1)
+        self.assertEqual(cassette.play('read', 'k1'), 2)
+        # calls beyond those recorded repeat the last response.
+        self.assertEqual(cassette.play('read', 'k1'), 2)
+        self.assertEqual([interaction['name'] for interaction in cassette.unplayed()], ['write'])
+
+        with self.assertRaises(ValueError):
+            cassette.play('write', 'k2')
+        with self.assertRaises(KeyError):
+            cassette.play('read', 'k3')
+        self.assertEqual(cassette.unplayed(), [])
+        self.assertEqual(len(cassette.played()), 3)
+
+    def test_play_returns_copies(self):
+        cassette = Cassette([{'name': 'read', 'key': 'k1', 'result': [1]}], replay=True)
+        cassette.play('read', 'k1').append(2)
+
+        self.assertEqual(cassette.play('read', 'k1'), [1])
+
+    def test_intercept_io_nesting(self):
+        calls = []
+
+        @intercept_io(name='read')
+        def read(key):
+            calls.append(key)
+            return {'key': key}
+
+        # without an active cassette, the call is passed through.
+        self.assertEqual(read('a'), {'key': 'a'})
+
+        outer, inner = Cassette(), Cassette()
+        with outer.active():
+            read('b')
+            with inner.active():
+                read('c')
+        self.assertEqual([interaction['result'] for interaction in outer.interactions], [{'key': 'b'}, {'key': 'c'}])
+        self.assertEqual([interaction['result'] for interaction in inner.interactions], [{'key': 'c'}])
+
+        # the innermost replaying cassette answers, and the outer one does not record.
+        replay = Cassette(list(inner.interactions), replay=True)
+        recording = Cassette()
+        with recording.active():
+            with replay.active():
+                self.assertEqual(read('c'), {'key': 'c'})
+        self.assertEqual(calls, ['a', 'b', 'c'])
+        self.assertEqual(recording.interactions, [])
+        self.assertEqual(replay.unplayed(), [])
+
+    def test_intercept_io_records_exceptions(self):
+        @intercept_io(name='fail')
+        def fail():
+            raise ValueError('denied')
+
+        cassette = Cassette()
+        with cassette.active():
+            with self.assertRaises(ValueError):
+                fail()
+
+        replay = Cassette(cassette.interactions, replay=True)
+        with replay.active():
+            with self.assertRaises(ValueError):
+                fail()
+
+    def test_unrecordable_response_returns_real_result(self):
+        lock = threading.Lock()
+
+        @intercept_io(name='locked')
+        def locked():
+            return {'lock': lock}
+
+        cassette = Cassette()
+        with cassette.active():
+            result = locked()
+
+        self.assertIs(result['lock'], lock)
+        self.assertEqual(cassette.interactions, [])
+        self.assertIn("'locked'", cassette.unrecordable)
+
+    def test_install_io_interceptors(self):
+        targets = [f"{IO_MODULE_NAME}.fetch", f"{IO_MODULE_NAME}.Client.get", f"{IO_MODULE_NAME}.decorated"]
+
+        # decorated is already intercepted, so it is not wrapped again.
+        self.assertEqual(edge_test_utils.install_io_interceptors(targets), targets[:2])
+        self.assertEqual(edge_test_utils.install_io_interceptors(targets), [])
+        self.assertEqual(self.io_module.fetch.__edge_io_name__, targets[0])
+        self.assertFalse(hasattr(self.io_module.decorated.__wrapped__, '__edge_io_name__'))
+
+        with self.assertRaises(ValueError):
+            edge_test_utils.install_io_interceptors([f"{IO_MODULE_NAME}.Client.ping"])
+        with self.assertRaises(ValueError):
+            edge_test_utils.install_io_interceptors([f"{IO_MODULE_NAME}.missing"])
+        self.assertEqual(edge_test_utils.install_io_interceptors(
+            [f"{IO_MODULE_NAME}.missing", 'edge_io_source.decorated.<locals>.inner'], skip_missing=True), [])
+
+        # self is excluded from the key of methods, so calls from other clients replay.
+        cassette = Cassette()
+        with cassette.active():
+            self.assertEqual(self.io_module.Client().get('a'), 'A')
+        replay = Cassette(cassette.interactions, replay=True)
+        with replay.active():
+            self.assertEqual(self.io_module.Client().get('a'), 'A')
+        self.assertEqual(self.io_module.calls, ['a'])
+
+    def test_capture_and_replay_offline(self):
+        edge_test_utils.register_io_callable(f"{IO_MODULE_NAME}.fetch")
+        EdgeTestConfig.enable()
+        target = importlib.import_module(TARGET_MODULE_NAME)
+
+        self.assertEqual(target.total_size(['ab', 'c']), 3)
+        self.assertEqual(self.io_module.calls, ['ab', 'c'])
+
+        case_path = self.case_paths('total_size')[0]
+        cassette_path = edge_test_utils.cassette_path_for(case_path)
+        self.assertEqual(len(Cassette.load(cassette_path).interactions), 2)
+
+        # replayed as by the test runner, in which the io_callables are not configured.
+        self.uninstall_io_interceptors()
+        EdgeTestConfig.io_callables = []
+        EdgeTestConfig.enable_edge_tests = False
+
+        self.assertTrue(self.apply_case(case_path))
+        self.assertEqual(self.io_module.calls, ['ab', 'c'])
+
+        # a recorded call that is not made on replay fails the case.
+        with open(cassette_path) as f:
+            cassette_data = json.load(f)
+        extra_interaction = dict(cassette_data['interactions'][0], key='0' * 32)
+        cassette_data['interactions'].append(extra_interaction)
+        with open(cassette_path, 'w') as f:
+            json.dump(cassette_data, f)
+        self.assertFalse(self.apply_case(case_path))
+
+    def test_unrecordable_call_saves_no_case(self):
+        edge_test_utils.register_io_callable(f"{IO_MODULE_NAME}.open_stream")
+        EdgeTestConfig.enable()
+        target = importlib.import_module(TARGET_MODULE_NAME)
+
+        with self.assertWarns(UserWarning):
+            self.assertEqual(target.stream_key('a'), 'a')
+
+        self.assertEqual(self.case_paths('stream_key'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# test_expand.py
+
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import importlib
+import contextlib
+import unittest
+from utilities import edge_test_utils
+from utilities.edge_test_utils import EdgeTestConfig
+
+IO_MODULE_NAME = 'edge_expand_io'
+TARGET_MODULE_NAME = 'edge_expand_target'
+IMPORT_IO_MODULE_NAME = 'edge_expand_import_io'
+
+IO_MODULE_SOURCE = '''
+calls = []
+
+def fetch(key):
+    calls.append(key)
+    return key
+'''
+
+TARGET_MODULE_SOURCE = '''
+from utilities.edge_test_utils import save_edge_tests
+
+@save_edge_tests()
+def inner(n):
+    return n * 2
+
+@save_edge_tests()
+def outer(n):
+    if n > 5:
+        return inner(n) + 1
+    return inner(n)
+'''
+
+IMPORT_IO_MODULE_SOURCE = '''
+from edge_expand_io import fetch
+
+settings = fetch('settings')
+'''
+
+
+class TestExpand(unittest.TestCase):
+    """
+    Unit tests for expand_test_cases() and the preparation of its worker processes.
+
+    Each test uses a temporary test_cases_folder and small modules written to a
+    temporary folder on sys.path, so that mutants are run in a real process pool.
+
+    Example:
+        To run the unit tests in this class, execute 'python -m unittest test_expand.py'
+        from the command line.
+    """
+
+    def setUp(self):
+        self.saved_enable_edge_tests = EdgeTestConfig.enable_edge_tests
+        self.saved_io_callables = list(EdgeTestConfig.io_callables)
+        self.saved_test_cases_folder = getattr(EdgeTestConfig, 'test_cases_folder', None)
+
+        self.temp_dirpath = tempfile.mkdtemp()
+        self.test_cases_folder = os.path.join(self.temp_dirpath, 'test_cases')
+        EdgeTestConfig.test_cases_folder = self.test_cases_folder
+
+        for module_name, source in ((IO_MODULE_NAME, IO_MODULE_SOURCE),
+                                    (TARGET_MODULE_NAME, TARGET_MODULE_SOURCE),
+                                    (IMPORT_IO_MODULE_NAME, IMPORT_IO_MODULE_SOURCE)):
+            with open(os.path.join(self.temp_dirpath, f"{module_name}.py"), 'w') as f:
+                f.write(source)
+        sys.path.insert(0, self.temp_dirpath)
+
+    def tearDown(self):
+        for target in list(edge_test_utils._installed_io_callables):
+            if target.startswith(f"{IO_MODULE_NAME}."):
+                owner, attr_name = edge_test_utils.resolve_dotted_path(target)
+                setattr(owner, attr_name, edge_test_utils._installed_io_callables.pop(target))
+        edge_test_utils._mutant_module = None
+        EdgeTestConfig.enable_edge_tests = self.saved_enable_edge_tests
+        EdgeTestConfig.io_callables = self.saved_io_callables
+        EdgeTestConfig.test_cases_folder = self.saved_test_cases_folder
+        sys.path.remove(self.temp_dirpath)
+        for module_name in (IO_MODULE_NAME, TARGET_MODULE_NAME, IMPORT_IO_MODULE_NAME):
+            sys.modules.pop(module_name, None)
+        shutil.rmtree(self.temp_dirpath)
+
+    def func_dirpath(self, func_name: str) -> str:
+        return os.path.join(self.test_cases_folder, TARGET_MODULE_NAME, func_name)
+
+    def num_cases(self, func_name: str) -> int:
+        return len([name for name in os.listdir(self.func_dirpath(func_name))
+                        if name.endswith('.json') and name != 'coverage.json'])
+
+    def expand(self, func_name: str) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return edge_test_utils.expand_test_cases(TARGET_MODULE_NAME, func_name, max_rounds=1, processes=2, live_io=True)
+
+    def test_workers_do_not_capture_decorated_callees(self):
+        EdgeTestConfig.enable()
+        target = importlib.import_module(TARGET_MODULE_NAME)
+        target.outer(6)
+        self.assertEqual((self.num_cases('outer'), self.num_cases('inner')), (1, 1))
+
+        # the mutant outer(0) takes the other branch, and so is saved.
+        self.assertGreater(self.expand('outer'), 0)
+
+        self.assertGreater(self.num_cases('outer'), 1)
+        self.assertEqual(self.num_cases('inner'), 1)
+
+    def test_output_variation_survives_capture(self):
+        EdgeTestConfig.enable()
+        target = importlib.import_module(TARGET_MODULE_NAME)
+        target.outer(6)
+        self.expand('outer')
+
+        coverage_path = os.path.join(self.func_dirpath('outer'), 'coverage.json')
+        with open(coverage_path) as f:
+            mutation_tested = json.load(f)['mutation_output_coverage']['tested']
+        self.assertTrue(mutation_tested)
+
+        # capturing another case recomputes 'output_coverage', but not the state of expand.
+        target.outer(7)
+        with open(coverage_path) as f:
+            self.assertEqual(json.load(f)['mutation_output_coverage']['tested'], mutation_tested)
+
+    def test_worker_refuses_io_on_import(self):
+        io_target = f"{IO_MODULE_NAME}.fetch"
+        with contextlib.redirect_stdout(io.StringIO()):
+            edge_test_utils.init_mutant_worker(IMPORT_IO_MODULE_NAME, [io_target], [], live_io=False)
+
+        io_module = importlib.import_module(IO_MODULE_NAME)
+        self.assertFalse(EdgeTestConfig.enable_edge_tests)
+        self.assertIsNone(edge_test_utils._mutant_module)
+        self.assertEqual(io_module.calls, [])
+        self.assertIsNone(edge_test_utils.run_mutant('fetch', '{}', None, 10))
+
+        edge_test_utils.init_mutant_worker(IMPORT_IO_MODULE_NAME, [io_target], [], live_io=True)
+        self.assertEqual(edge_test_utils._mutant_module.settings, 'settings')
+        self.assertEqual(io_module.calls, ['settings'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+# test_iterator_capture.py
+
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import importlib
+import contextlib
+import unittest
+from utilities import edge_test_utils
+from utilities.edge_test_utils import EdgeTestConfig, IteratorSummary
+
+CONFIG_SETTINGS = (
+    'enable_edge_tests',
+    'test_count_limit',
+    'iterator_head_limit',
+    )
+
+TARGET_MODULE_NAME = 'edge_iterator_target'
+
+TARGET_MODULE_SOURCE = '''
+from utilities.edge_test_utils import save_edge_tests
+
+closed = []
+
+@save_edge_tests()
+def numbers(n):
+    try:
+        for i in range(n):
+            yield {'i': i}
+    finally:
+        closed.append(n)
+'''
+
+
+class TestIteratorCapture(unittest.TestCase):
+    """
+    Unit tests for capturing and replaying functions that return generators.
+
+    Each test uses a temporary test_cases_folder and a small target module written to a
+    temporary folder on sys.path, so that cases are captured and replayed for real.
+
+    Example:
+        To run the unit tests in this class, execute 'python -m unittest test_iterator_capture.py'
+        from the command line.
+    """
+
+    def setUp(self):
+        self.saved_settings = {name: getattr(EdgeTestConfig, name) for name in CONFIG_SETTINGS}
+        self.saved_test_cases_folder = getattr(EdgeTestConfig, 'test_cases_folder', None)
+
+        self.temp_dirpath = tempfile.mkdtemp()
+        self.test_cases_folder = os.path.join(self.temp_dirpath, 'test_cases')
+        EdgeTestConfig.test_cases_folder = self.test_cases_folder
+        EdgeTestConfig.iterator_head_limit = 3
+        EdgeTestConfig.enable()
+
+        with open(os.path.join(self.temp_dirpath, f"{TARGET_MODULE_NAME}.py"), 'w') as f:
+            f.write(TARGET_MODULE_SOURCE)
+        sys.path.insert(0, self.temp_dirpath)
+        self.target = importlib.import_module(TARGET_MODULE_NAME)
+        self.func_dirpath = os.path.join(self.test_cases_folder, TARGET_MODULE_NAME, 'numbers')
+
+    def tearDown(self):
+        for name, value in self.saved_settings.items():
+            setattr(EdgeTestConfig, name, value)
+        EdgeTestConfig.test_cases_folder = self.saved_test_cases_folder
+        sys.path.remove(self.temp_dirpath)
+        sys.modules.pop(TARGET_MODULE_NAME, None)
+        shutil.rmtree(self.temp_dirpath)
+
+    def case_paths(self):
+        if not os.path.exists(self.func_dirpath):
+            return []
+        return [os.path.join(self.func_dirpath, name) for name in sorted(os.listdir(self.func_dirpath))
+                    if name.endswith('.json') and name != 'coverage.json']
+
+    def apply_case(self, case_path: str) -> bool:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return edge_test_utils.apply_edge_test_at_path(case_path)
+
+    def test_summary_head_count_and_tail(self):
+        summary = IteratorSummary(2)
+        for item in range(5):
+            summary.add(item)
+        summary_dict = summary.to_dict()
+
+        self.assertEqual(summary_dict['head_limit'], 2)
+        self.assertEqual(summary_dict['head'], [0, 1])
+        self.assertEqual(summary_dict['count'], 5)
+
+        self.assertEqual(edge_test_utils.summarize_iterator(range(5), 2), summary_dict)
+        self.assertNotEqual(edge_test_utils.summarize_iterator([0, 1, 2, 3, 9], 2)['tail_md5'],
+                            summary_dict['tail_md5'])
+
+    def test_summary_copies_head_and_hashes_unpicklable_tail(self):
+        summary = IteratorSummary(1)
+        item = {'a': [1]}
+        summary.add(item)
+        item['a'].append(2)
+        # a generator cannot be pickled, so its repr is hashed instead.
+        summary.add((x for x in ()))
+
+        summary_dict = summary.to_dict()
+        self.assertEqual(summary_dict['head'], [{'a': [1]}])
+        self.assertEqual(summary_dict['count'], 2)
+
+    def test_only_generators_are_captured(self):
+        self.assertTrue(edge_test_utils.is_capturable_iterator(x for x in ()))
+        self.assertFalse(edge_test_utils.is_capturable_iterator(iter([1, 2])))
+        with open(os.path.join(self.temp_dirpath, f"{TARGET_MODULE_NAME}.py")) as f:
+            self.assertFalse(edge_test_utils.is_capturable_iterator(f))
+
+    def test_exhausted_generator_records_case(self):
+        items = list(self.target.numbers(5))
+
+        self.assertEqual(items, [{'i': i} for i in range(5)])
+        case_paths = self.case_paths()
+        self.assertEqual(len(case_paths), 1)
+        with open(case_paths[0]) as f:
+            case_data = json.load(f)
+        self.assertEqual(case_data['result_type'], 'iterator')
+        self.assertEqual(case_data['result']['count'], 5)
+        self.assertEqual(len(case_data['result']['head']), 3)
+
+        # the lines of the generator body are covered, not just the call.
+        coverage_data = edge_test_utils.load_coverage_data(self.func_dirpath)
+        code_lines = edge_test_utils.function_code_lines(self.target.numbers.__wrapped__)
+        self.assertTrue(code_lines.issubset(coverage_data['code_coverage']))
+
+    def test_early_stop_records_no_case_and_closes_generator(self):
+        generator = self.target.numbers(5)
+        self.assertEqual(next(generator), {'i': 0})
+        generator.close()
+
+        self.assertEqual(self.case_paths(), [])
+        self.assertEqual(self.target.closed, [5])
+
+    def test_replay_iterator_case(self):
+        list(self.target.numbers(5))
+        case_path = self.case_paths()[0]
+
+        self.assertTrue(self.apply_case(case_path))
+
+        # a different number of items is detected on replay.
+        with open(case_path) as f:
+            case_data = json.load(f)
+        case_data['result']['count'] = 6
+        with open(case_path, 'w') as f:
+            json.dump(case_data, f)
+        self.assertFalse(self.apply_case(case_path))
+
+    def test_saturated_function_returns_generator_unwrapped(self):
+        EdgeTestConfig.test_count_limit = 1
+        list(self.target.numbers(5))
+        self.assertTrue(edge_test_utils.is_saturated(self.target.numbers.__wrapped__, self.func_dirpath))
+
+        generator = self.target.numbers(6)
+        self.assertEqual(generator.__name__, 'numbers')
+        list(generator)
+        self.assertEqual(len(self.case_paths()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
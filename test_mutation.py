@@ -0,0 +1,89 @@
+# test_mutation.py
+
+import unittest
+from utilities import edge_test_utils
+
+
+class TestMutation(unittest.TestCase):
+    """
+    Unit tests for the input mutations used by expand_test_cases().
+
+    Example:
+        To run the unit tests in this class, execute 'python -m unittest test_mutation.py'
+        from the command line.
+    """
+
+    def test_mutate_bool(self):
+        self.assertEqual(edge_test_utils.mutate_value(True), [False])
+
+    def test_mutate_int(self):
+        mutations = edge_test_utils.mutate_value(5)
+        self.assertEqual(mutations, [0, 1, -1, 6, 4, -5])
+        self.assertTrue(all(type(m) is int for m in mutations))
+
+    def test_mutate_int_excludes_value_and_duplicates(self):
+        # 0 + 1 == 1 and -0 == 0 are not repeated, and 0 itself is excluded.
+        self.assertEqual(edge_test_utils.mutate_value(0), [1, -1])
+
+    def test_mutate_float(self):
+        mutations = edge_test_utils.mutate_value(2.5)
+        self.assertIn(0.0, mutations)
+        self.assertIn(-2.5, mutations)
+        self.assertIn(float('inf'), mutations)
+        self.assertNotIn(2.5, mutations)
+        self.assertTrue(all(type(m) is float for m in mutations))
+
+    def test_mutate_str(self):
+        mutations = edge_test_utils.mutate_value('abcd')
+        self.assertEqual(mutations, ['', 'a', 'ab', 'abcdd', ' abcd ', 'ABCD'])
+
+    def test_mutate_bytes(self):
+        self.assertEqual(edge_test_utils.mutate_value(b'abcd'), [b'', b'a', b'ab', b'abcdd'])
+
+    def test_mutate_list(self):
+        mutations = edge_test_utils.mutate_value([1, 2])
+        for expected in ([], [1], [1, 2, 2], [0, 2], [1, 3]):
+            self.assertIn(expected, mutations)
+        self.assertNotIn([1, 2], mutations)
+        self.assertTrue(all(type(m) is list for m in mutations))
+
+    def test_mutate_tuple(self):
+        mutations = edge_test_utils.mutate_value((1, 'a'))
+        for expected in ((), (1,), (1, 'a', 'a'), (0, 'a'), (1, '')):
+            self.assertIn(expected, mutations)
+        self.assertTrue(all(type(m) is tuple for m in mutations))
+
+    def test_mutate_dict(self):
+        mutations = edge_test_utils.mutate_value({'a': 1, 'b': 'x'})
+        for expected in ({}, {'b': 'x'}, {'a': 1}, {'a': 0, 'b': 'x'}, {'a': 1, 'b': ''}):
+            self.assertIn(expected, mutations)
+        self.assertTrue(all(type(m) is dict for m in mutations))
+
+    def test_mutate_depth_limit(self):
+        # elements nested deeper than 2 levels are not mutated.
+        mutations = edge_test_utils.mutate_value([[[5]]])
+        self.assertNotIn([[[0]]], mutations)
+        self.assertIn([[]], mutations)
+
+    def test_mutate_other_types(self):
+        self.assertEqual(edge_test_utils.mutate_value(None), [])
+        self.assertEqual(edge_test_utils.mutate_value(object()), [])
+
+    def test_generate_input_mutants(self):
+        mutants = list(edge_test_utils.generate_input_mutants([True], {'flag': False, 'name': None}))
+        self.assertEqual(mutants, [
+            ([False], {'flag': False, 'name': None}),
+            ([True], {'flag': True, 'name': None}),
+            ])
+
+    def test_generate_input_mutants_leaves_seed_unchanged(self):
+        pre_args = [1]
+        pre_kwargs = {'n': 2}
+        for _ in edge_test_utils.generate_input_mutants(pre_args, pre_kwargs):
+            pass
+        self.assertEqual(pre_args, [1])
+        self.assertEqual(pre_kwargs, {'n': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()